@@ -6,6 +6,7 @@ import os
 import random
 import torch
 import torch.backends.cudnn as cudnn
+import torch.distributed as dist
 import util
 
 
@@ -61,9 +62,9 @@ class BaseArgParser(object):
                                  help='Dataset to use.')
         self.parser.add_argument('--deterministic', type=util.str_to_bool, default=False,
                                  help='If true, set a random seed to get deterministic results.')
-        self.parser.add_argument('--cudnn_benchmark', type=util.str_to_bool, default=False,
+        self.parser.add_argument('--cudnn_benchmark', type=util.str_to_bool, default=None,
                                  help='Set cudnn benchmark to save fastest computation algorithm for fixed size inputs. \
-                                       Turn off when input size is variable.')
+                                       Turn off when input size is variable. Defaults to on for fixed-size windows.')
         self.parser.add_argument('--hide_probability', type=float, default=0.0,
                                  help='Probability of hiding squares in hide-and-seek.')
         self.parser.add_argument('--hide_level', type=str, choices=('window', 'image'), default='window',
@@ -84,10 +85,11 @@ class BaseArgParser(object):
         # Save args to a JSON file
         date_string = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         save_dir = os.path.join(args.save_dir, '{}_{}'.format(args.name, date_string))
-        os.makedirs(save_dir, exist_ok=True)
-        with open(os.path.join(save_dir, 'args.json'), 'w') as fh:
-            json.dump(vars(args), fh, indent=4, sort_keys=True)
-            fh.write('\n')
+        if util.is_main_process():
+            os.makedirs(save_dir, exist_ok=True)
+            with open(os.path.join(save_dir, 'args.json'), 'w') as fh:
+                json.dump(vars(args), fh, indent=4, sort_keys=True)
+                fh.write('\n')
         args.save_dir = save_dir
 
         # Add configuration flags outside of the CLI
@@ -97,6 +99,8 @@ class BaseArgParser(object):
             raise ValueError('Must specify --ckpt_path in test mode.')
         if args.is_training and args.epochs_per_save % args.epochs_per_eval != 0:
             raise ValueError('epochs_per_save must be divisible by epochs_per_eval.')
+        if args.is_training and args.accumulate_steps < 1:
+            raise ValueError('accumulate_steps must be at least 1.')
         if args.is_training:
             args.maximize_metric = not args.best_ckpt_metric.endswith('loss')
             if args.lr_scheduler == 'multi_step':
@@ -110,13 +114,43 @@ class BaseArgParser(object):
 
         # Set up available GPUs
         args.gpu_ids = util.args_to_list(args.gpu_ids, allow_empty=True, arg_type=int, allow_negative=False)
+        args.distributed = bool(self.is_training) and util.is_distributed()
+        if args.distributed:
+            # One process per GPU (launched with torchrun), each process owns the GPU at its local rank
+            args.local_rank = int(os.environ['LOCAL_RANK'])
+            args.gpu_ids = [args.local_rank]
         if len(args.gpu_ids) > 0 and torch.cuda.is_available():
             # Set default GPU for `tensor.to('cuda')`
             torch.cuda.set_device(args.gpu_ids[0])
             args.device = 'cuda'
-            cudnn.benchmark = args.cudnn_benchmark
         else:
             args.device = 'cpu'
+        if args.distributed:
+            # Only rank 0 evaluates, and the other ranks wait for its metrics. Allow for a long validation pass.
+            dist.init_process_group('nccl' if args.device == 'cuda' else 'gloo', timeout=datetime.timedelta(hours=2))
+            if args.batch_size % dist.get_world_size() != 0:
+                raise ValueError('batch_size must be divisible by the number of distributed processes.')
+        if args.is_training and args.compile_mode and len(args.gpu_ids) > 1:
+            # Compiled modules cannot be replicated by DataParallel
+            raise ValueError('compile_mode needs one GPU per process. Launch with torchrun for multiple GPUs.')
+        if args.is_training and args.use_amp and args.device != 'cuda':
+            raise ValueError('use_amp is only supported on CUDA devices.')
+        if args.is_training and args.jit_trace:
+            # The traced module bypasses the DataParallel/DDP wrapper, including DDP's gradient allreduce
+            if len(args.gpu_ids) > 1 or args.distributed:
+                raise ValueError('jit_trace is only supported for single-GPU training.')
+            if args.compile_mode:
+                raise ValueError('Use only one of jit_trace and compile_mode.')
+        if args.is_training and args.cuda_graphs:
+            # A captured backward overwrites the grads, and replays skip the DataParallel/DDP wrapper
+            if args.device != 'cuda' or len(args.gpu_ids) > 1 or args.distributed:
+                raise ValueError('cuda_graphs is only supported for single-GPU training.')
+            if args.accumulate_steps != 1:
+                raise ValueError('cuda_graphs does not support accumulate_steps > 1.')
+            if args.cuda_graph_warmup < 1:
+                raise ValueError('cuda_graph_warmup must be at least 1.')
+            if args.compile_mode:
+                raise ValueError('Use only one of cuda_graphs and compile_mode (try compile_mode=reduce-overhead).')
 
         # Set random seed for a deterministic run
         if args.deterministic:
@@ -131,6 +165,10 @@ class BaseArgParser(object):
         elif args.dataset == 'pe':
             args.dataset = 'CTPEDataset3d'
 
+        if self.is_training and args.gpu_augment and args.dataset != 'CTPEDataset3d':
+            # Kinetics has no pixel_dict for the fill value, and its loader already flips on the CPU
+            raise ValueError('gpu_augment is only supported for the PE dataset.')
+
         if self.is_training and args.use_pretrained:
             if args.model != 'PENet' and args.model != 'PENetClassifier':
                 raise ValueError('Pre-training only supported for PENet/PENetClassifier loading PENetClassifier.')
@@ -149,6 +187,15 @@ class BaseArgParser(object):
             if args.dataset == 'KineticsDataset':
                 args.data_loader = 'KineticsDataLoader'
 
+        if args.distributed and args.loader == 'series':
+            raise ValueError('Distributed training is not supported with the series loader.')
+
+        # Window loaders pad/crop every input to the same shape, so cuDNN autotuning pays off
+        if args.cudnn_benchmark is None:
+            args.cudnn_benchmark = args.loader != 'series' and not args.deterministic
+        if args.device == 'cuda':
+            cudnn.benchmark = args.cudnn_benchmark
+
         # Set up output dir (test mode only)
         if not self.is_training:
             args.results_dir = os.path.join(args.results_dir, '{}_{}'.format(args.name, date_string))
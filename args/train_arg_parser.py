@@ -37,6 +37,8 @@ class TrainArgParser(BaseArgParser):
                                  help='Number of recent ckpts to keep before overwriting old ones.')
         self.parser.add_argument('--best_ckpt_metric', type=str, default='val_loss', choices=('val_loss', 'val_AUROC'),
                                  help='Metric used to determine which checkpoint is best.')
+        self.parser.add_argument('--eval_batch_size', type=int, default=0,
+                                 help='Batch size for evaluation during training. If 0, use batch_size.')
         self.parser.add_argument('--max_eval', type=int, default=-1,
                                  help='Max number of examples to evaluate from the training set.')
         self.parser.add_argument('--optimizer', type=str, default='sgd', choices=('sgd', 'adam'), help='Optimizer.')
@@ -57,6 +59,8 @@ class TrainArgParser(BaseArgParser):
                                  help='If true, do random vertical flip during training.')
         self.parser.add_argument('--do_rotate', type=util.str_to_bool, default=True,
                                  help='If true, do random rotation (up to +/- 15 degrees) of the scan during training.')
+        self.parser.add_argument('--gpu_augment', type=util.str_to_bool, default=False,
+                                 help='If true, do random flips and rotation per batch on the GPU, not in the loader.')
         self.parser.add_argument('--do_jitter', type=util.str_to_bool, default=True,
                                  help='If true, do random jitter of starting slices during training.')
         self.parser.add_argument('--do_center_pe', type=util.str_to_bool, default=True,
@@ -75,3 +79,22 @@ class TrainArgParser(BaseArgParser):
                                  help='Initial learning rate for fine-tuning pretrained parameters.')
         self.parser.add_argument('--fine_tuning_boundary', type=str, default='encoders.3',
                                  help='Name of first layer that is not considered a fine-tuning layer.')
+        self.parser.add_argument('--accumulate_steps', type=int, default=1,
+                                 help='Number of batches to accumulate gradients over before each optimizer step.')
+        self.parser.add_argument('--use_amp', type=util.str_to_bool, default=False,
+                                 help='If True, train with automatic mixed precision (CUDA only).')
+        self.parser.add_argument('--amp_dtype', type=str, default='float16', choices=('float16', 'bfloat16'),
+                                 help='Reduced precision dtype to use with --use_amp. bfloat16 needs no loss scaling.')
+        self.parser.add_argument('--channels_last', type=util.str_to_bool, default=False,
+                                 help='If True, use the channels-last (NDHWC) memory format for the model and inputs.')
+        self.parser.add_argument('--compile_mode', type=str, default='',
+                                 choices=('', 'default', 'reduce-overhead', 'max-autotune'),
+                                 help='If set, compile the model with torch.compile in this mode (PyTorch 2.2+).')
+        self.parser.add_argument('--jit_trace', type=util.str_to_bool, default=False,
+                                 help='If True, train a torch.jit.trace of the model, specialized to the window shape.')
+        self.parser.add_argument('--cuda_graphs', type=util.str_to_bool, default=False,
+                                 help='If True, capture forward and backward in a CUDA graph and replay it each step.')
+        self.parser.add_argument('--cuda_graph_warmup', type=int, default=3,
+                                 help='Number of eager training iterations to run before capturing the CUDA graph.')
+        self.parser.add_argument('--local_rank', '--local-rank', type=int, default=-1,
+                                 help='Accepted from torch.distributed.launch, which passes it. LOCAL_RANK is used.')
@@ -1,2 +1,3 @@
 from .ct_data_loader import CTDataLoader
+from .gpu_cached_loader import GPUCachedLoader
 from .kinetics_data_loader import KineticsDataLoader
@@ -1,7 +1,9 @@
 import datasets
 import torch
+import util
 
 from torch.utils.data import DataLoader
+from torch.utils.data.distributed import DistributedSampler
 from torch.nn.utils.rnn import pad_sequence
 from .padded_inputs import PaddedInputs
 from .sorted_sampler import SortedSampler
@@ -15,23 +17,34 @@ class CTDataLoader(DataLoader):
         dataset_fn = datasets.__dict__[args.dataset]
         dataset = dataset_fn(args, phase, is_training)
         self.batch_size_ = args.batch_size
+        if not is_training and getattr(args, 'eval_batch_size', 0) > 0:
+            # Evaluation keeps no activations for backward, so it can afford larger batches
+            self.batch_size_ = args.eval_batch_size
         self.phase = phase
+        loader_kwargs = {'num_workers': args.num_workers, 'pin_memory': True}
+        if args.num_workers > 0:
+            # Keep workers alive across epochs and let each one queue batches ahead of the GPU
+            loader_kwargs.update(persistent_workers=True, prefetch_factor=4)
+        sampler = None
+        if is_training and getattr(args, 'distributed', False):
+            # Each process loads a disjoint shard, so batch_size stays the global batch size (as with DataParallel)
+            self.batch_size_ = args.batch_size // util.get_world_size()
+            sampler = DistributedSampler(dataset, shuffle=True)
         if args.loader == 'series':
-            batch_sampler = SortedSampler(batch_size=args.batch_size,
+            batch_sampler = SortedSampler(batch_size=self.batch_size_,
                                           drop_last=True,
                                           data_source=dataset,
                                           shuffle=is_training)
             super(CTDataLoader, self).__init__(dataset,
-                                               num_workers=args.num_workers,
                                                batch_sampler=batch_sampler,
                                                collate_fn=self.pad_sequences,
-                                               pin_memory=True)
+                                               **loader_kwargs)
         elif args.loader == 'window' or args.loader == 'slice':
             super(CTDataLoader, self).__init__(dataset,
-                                               batch_size=args.batch_size,
-                                               shuffle=is_training,
-                                               num_workers=args.num_workers,
-                                               pin_memory=True)
+                                               batch_size=self.batch_size_,
+                                               shuffle=is_training and sampler is None,
+                                               sampler=sampler,
+                                               **loader_kwargs)
         else:
             raise NotImplementedError('Invalid args.loader: {}'.format(args.loader))
 
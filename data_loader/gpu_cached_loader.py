@@ -0,0 +1,62 @@
+import torch
+
+
+class GPUCachedLoader(object):
+    """Loader that reads a wrapped DataLoader once and keeps every example resident on the GPU.
+
+    Only meant for toy datasets that fit in device memory. Removes the per-batch host-to-device
+    copy and worker IPC, at the cost of applying data augmentation once when the cache is built
+    rather than on every epoch.
+    """
+    def __init__(self, data_loader, device, shuffle=True):
+        """
+        Args:
+            data_loader: DataLoader to read from. Iterated exactly once.
+            device: Device on which to keep the cached examples.
+            shuffle: If true, shuffle the cached examples at the start of every epoch.
+        """
+        self.dataset = data_loader.dataset
+        self.phase = data_loader.phase
+        self.batch_size_ = data_loader.batch_size_
+        self.device = device
+        self.shuffle = shuffle
+
+        all_inputs = []
+        all_targets = {}
+        for inputs, target_dict in data_loader:
+            all_inputs.append(inputs.to(device, non_blocking=True))
+            for k, v in target_dict.items():
+                all_targets.setdefault(k, []).append(v.to(device, non_blocking=True)
+                                                     if isinstance(v, torch.Tensor) else v)
+
+        self.inputs = torch.cat(all_inputs)
+        self.targets = {}
+        for k, v in all_targets.items():
+            if isinstance(v[0], torch.Tensor):
+                self.targets[k] = torch.cat(v)
+            else:
+                self.targets[k] = [item for batch in v for item in batch]
+
+    def __len__(self):
+        return (self.inputs.size(0) + self.batch_size_ - 1) // self.batch_size_
+
+    def __iter__(self):
+        num_examples = self.inputs.size(0)
+        if self.shuffle:
+            order = torch.randperm(num_examples, device=self.device)
+        else:
+            order = torch.arange(num_examples, device=self.device)
+        # Non-tensor targets (e.g. dset_path strings) are indexed on the host
+        order_list = order.tolist()
+
+        for start in range(0, num_examples, self.batch_size_):
+            idxs = order[start:start + self.batch_size_]
+            idxs_list = order_list[start:start + self.batch_size_]
+            target_dict = {k: v[idxs] if isinstance(v, torch.Tensor) else [v[i] for i in idxs_list]
+                           for k, v in self.targets.items()}
+
+            yield self.inputs[idxs], target_dict
+
+    def get_series_label(self, series_idx):
+        """Get a floating point label for a series at given index."""
+        return self.dataset.get_series_label(series_idx)
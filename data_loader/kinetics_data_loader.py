@@ -1,7 +1,9 @@
 import torch.utils.data as data
+import util
 import util.transforms as transforms
 
 from datasets import KineticsDataset
+from torch.utils.data.distributed import DistributedSampler
 
 
 class KineticsDataLoader(data.DataLoader):
@@ -10,6 +12,8 @@ class KineticsDataLoader(data.DataLoader):
 
         self.phase = phase
         self.batch_size_ = args.batch_size
+        if not is_training and getattr(args, 'eval_batch_size', 0) > 0:
+            self.batch_size_ = args.eval_batch_size
 
         # Normalization
         norm_value = 255
@@ -44,9 +48,17 @@ class KineticsDataLoader(data.DataLoader):
             target_transform = transforms.ClassLabel()
             n_samples = 3
 
+        loader_kwargs = {'num_workers': args.num_workers, 'pin_memory': True}
+        if args.num_workers > 0:
+            loader_kwargs.update(persistent_workers=True, prefetch_factor=4)
+
         dataset = KineticsDataset(args, phase, n_samples, spatial_transform, temporal_transform, target_transform)
+        sampler = None
+        if is_training and getattr(args, 'distributed', False):
+            self.batch_size_ = args.batch_size // util.get_world_size()
+            sampler = DistributedSampler(dataset, shuffle=True)
         super(KineticsDataLoader, self).__init__(dataset,
-                                                 batch_size=args.batch_size,
-                                                 shuffle=is_training,
-                                                 num_workers=args.num_workers,
-                                                 pin_memory=True)
+                                                 batch_size=self.batch_size_,
+                                                 shuffle=is_training and sampler is None,
+                                                 sampler=sampler,
+                                                 **loader_kwargs)
@@ -4,6 +4,13 @@ class PaddedInputs(object):
         self.inputs = inputs
         self.length = length
 
-    def to(self, device):
-        self.inputs.to(device)
-        self.length.to(device)
+    def pin_memory(self):
+        """Pin the wrapped tensors so the DataLoader's pinning thread recognizes this batch type."""
+        self.inputs = self.inputs.pin_memory()
+        self.length = self.length.pin_memory()
+        return self
+
+    def to(self, device, non_blocking=False):
+        self.inputs = self.inputs.to(device, non_blocking=non_blocking)
+        self.length = self.length.to(device, non_blocking=non_blocking)
+        return self
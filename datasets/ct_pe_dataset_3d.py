@@ -28,9 +28,11 @@ class CTPEDataset3d(BaseCTDataset):
 
         # Augmentation
         self.crop_shape = args.crop_shape
-        self.do_hflip = self.is_training_set and args.do_hflip
-        self.do_vflip = self.is_training_set and args.do_vflip
-        self.do_rotate = self.is_training_set and args.do_rotate
+        # Flips and rotation are done by util.transforms.GPUAugmenter when args.gpu_augment is set
+        cpu_augment = not getattr(args, 'gpu_augment', False)
+        self.do_hflip = self.is_training_set and cpu_augment and args.do_hflip
+        self.do_vflip = self.is_training_set and cpu_augment and args.do_vflip
+        self.do_rotate = self.is_training_set and cpu_augment and args.do_rotate
         self.do_jitter = self.is_training_set and args.do_jitter
         self.do_center_abnormality = self.is_training_set and args.do_center_pe
 
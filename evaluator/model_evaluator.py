@@ -91,10 +91,11 @@ class ModelEvaluator(object):
                 if num_evaluated >= num_examples:
                     break
 
-                with torch.no_grad():
-                    cls_logits = model.forward(inputs.to(device))
-                    cls_targets = targets_dict['is_abnormal']
-                    loss = self.cls_loss_fn(cls_logits, cls_targets.to(device))
+                # Inference mode also skips version counters and view tracking, unlike no_grad
+                with torch.inference_mode():
+                    cls_logits = model(inputs.to(device, non_blocking=True))
+                    cls_targets = targets_dict['is_abnormal'].to(device, non_blocking=True)
+                    loss = self.cls_loss_fn(cls_logits, cls_targets)
 
                 self._record_batch(cls_logits, targets_dict['series_idx'], loss, **records)
 
@@ -122,7 +123,7 @@ class ModelEvaluator(object):
         """
         if probs is not None:
             assert keys is not None, 'Must keep probs and keys lists in parallel'
-            with torch.no_grad():
+            with torch.inference_mode():
                 batch_probs = F.sigmoid(logits)
             probs.append(batch_probs)
 
@@ -130,7 +131,7 @@ class ModelEvaluator(object):
             keys.append(targets)
 
         if loss_meter is not None:
-            loss_meter.update(loss.item(), logits.size(0))
+            loss_meter.update(loss.detach(), logits.size(0))
 
     def _get_summary_dicts(self, data_loader, phase, device, probs=None, keys=None, loss_meter=None):
         """Get summary dictionaries given dictionary of records kept during evaluation.
@@ -153,9 +154,9 @@ class ModelEvaluator(object):
             assert keys is not None, 'Must keep probs and keys lists in parallel.'
             assert self.aggregator is not None, 'Must specify an aggregator to aggregate probs and keys.'
 
-            # Convert to flat numpy array
-            probs = np.concatenate(probs).ravel().tolist()
-            keys = np.concatenate(keys).ravel().tolist()
+            # Concatenate once on the device, then copy to a flat list in a single transfer
+            probs = torch.cat(probs).cpu().numpy().ravel().tolist()
+            keys = torch.cat(keys).cpu().numpy().ravel().tolist()
 
             # Aggregate predictions across each series
             idx2prob = self.aggregator.aggregate(keys, probs, data_loader, phase, device)
@@ -185,7 +186,7 @@ class ModelEvaluator(object):
 
         if loss_meter is not None:
             metrics.update({
-                phase + '_' + 'loss': loss_meter.avg
+                phase + '_' + 'loss': float(loss_meter.avg)
             })
 
         return metrics, curves
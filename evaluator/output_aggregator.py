@@ -3,7 +3,6 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optim
-import util
 
 from collections import defaultdict
 
@@ -44,6 +43,9 @@ class OutputAggregator(object):
         Returns:
             Dictionary mapping each series index in idxs to a single scalar probability.
         """
+        if self.agg_method in ('max', 'mean'):
+            return self._reduce_sorted(keys, outputs)
+
         # Group outputs by key
         key2outputs = defaultdict(list)
         for key, output in zip(keys, outputs):
@@ -55,6 +57,23 @@ class OutputAggregator(object):
             # Reduce outputs for each key into a single output
         return {key: self._reduce(outputs) for key, outputs in key2outputs.items()}
 
+    def _reduce_sorted(self, keys, outputs):
+        """Reduce outputs for each key with vectorized NumPy ops instead of a per-output Python loop.
+
+        Sorts outputs by key so each key's outputs are contiguous, then reduces every group at once.
+        """
+        keys, outputs = np.asarray(keys), np.asarray(outputs)
+        order = np.argsort(keys, kind='stable')
+        keys, outputs = keys[order], outputs[order]
+        unique_keys, group_starts, group_sizes = np.unique(keys, return_index=True, return_counts=True)
+
+        if self.agg_method == 'max':
+            reduced = np.maximum.reduceat(outputs, group_starts)
+        else:
+            reduced = np.add.reduceat(outputs, group_starts) / group_sizes
+
+        return dict(zip(unique_keys.tolist(), reduced))
+
     def train_log_reg(self, key2outputs, data_loader, device):
         """Trains the logistic regression reducer and creates and stores the reduce fn."""
         # Reset the model parameters every epoch
@@ -64,18 +83,19 @@ class OutputAggregator(object):
         optimizer = optim.Adam(self.classifier.parameters(), lr=.001)
         loss_fn = nn.BCEWithLogitsLoss()
 
+        # Build histogram features and labels once, rather than re-allocating them for every series each epoch
+        keys = list(key2outputs)
+        hists = [np.histogram(key2outputs[key], bins=self.num_bins, range=(0, 1))[0] for key in keys]
+        all_inputs = torch.tensor(np.stack(hists), dtype=torch.float32).to(device)
+        all_labels = torch.tensor([[data_loader.get_series_label(key)] for key in keys], dtype=torch.float32).to(device)
+
         for epoch in range(self.num_epochs):
             # Iterate through all series
-            for key in key2outputs:
-                probs = key2outputs[key]
-                hist, _ = np.histogram(probs, bins=self.num_bins, range=(0, 1))
-
-                inputs = torch.tensor(hist, dtype=torch.float32).to(device)
-                label = torch.tensor([data_loader.get_series_label(key)], dtype=torch.float32).to(device)
+            for inputs, label in zip(all_inputs, all_labels):
                 logits = self.classifier(inputs)
                 loss = loss_fn(logits, label)
 
-                optimizer.zero_grad()
+                optimizer.zero_grad(set_to_none=True)
                 loss.backward()
                 optimizer.step()
 
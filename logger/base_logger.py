@@ -1,13 +1,9 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 import torch.nn.functional as F
 import util
 
 from datetime import datetime
-from tensorboardX import SummaryWriter
-
-plt.switch_backend('agg')
 
 
 class BaseLogger(object):
@@ -27,7 +23,12 @@ class BaseLogger(object):
         self.num_visuals = args.num_visuals
         self.log_path = os.path.join(self.save_dir, '{}.log'.format(args.name))
         log_dir = os.path.join('logs', args.name + '_' + datetime.now().strftime('%b%d_%H%M'))
-        self.summary_writer = SummaryWriter(log_dir=log_dir)
+        # Only the main process writes logs when training is distributed
+        self.is_main_process = util.is_main_process()
+        self.summary_writer = None
+        if self.is_main_process:
+            from tensorboardX import SummaryWriter
+            self.summary_writer = SummaryWriter(log_dir=log_dir)
 
         self.epoch = args.start_epoch
         # Current iteration in epoch (i.e., # examples seen in the current epoch)
@@ -40,6 +41,8 @@ class BaseLogger(object):
 
     def _log_scalars(self, scalar_dict, print_to_stdout=True):
         """Log all values in a dict as scalars to TensorBoard."""
+        if not self.is_main_process:
+            return
         for k, v in scalar_dict.items():
             if print_to_stdout:
                 self.write('[{}: {:.3g}]'.format(k, v))
@@ -48,6 +51,12 @@ class BaseLogger(object):
 
     def _plot_curves(self, curves_dict):
         """Plot all curves in a dict as RGB images to TensorBoard."""
+        if not self.is_main_process:
+            return
+
+        # Import PyPlot on first use: importing matplotlib is slow and most processes never plot
+        import matplotlib.pyplot as plt
+        plt.switch_backend('agg')
         for name, curve in curves_dict.items():
             fig = plt.figure()
             ax = plt.gca()
@@ -74,8 +83,10 @@ class BaseLogger(object):
 
             fig.canvas.draw()
 
-            curve_img = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
-            curve_img = curve_img.reshape((3,) + fig.canvas.get_width_height()[::-1])
+            curve_img = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8)
+            curve_img = curve_img.reshape(fig.canvas.get_width_height()[::-1] + (3,)).transpose(2, 0, 1)
+            # Close the figure, otherwise pyplot keeps every figure from every epoch alive
+            plt.close(fig)
             self.summary_writer.add_image(name.replace('_', '/'), curve_img, global_step=self.global_step)
 
     def visualize(self, inputs, cls_logits, targets_dict, phase, unique_id=None):
@@ -93,7 +104,7 @@ class BaseLogger(object):
             Number of examples visualized to TensorBoard.
         """
 
-        if self.pixel_dict is None:
+        if self.pixel_dict is None or not self.is_main_process:
             # Set pixel_dict to None to bypass visualization
             return 0
 
@@ -134,6 +145,8 @@ class BaseLogger(object):
 
     def write(self, message, print_to_stdout=True):
         """Write a message to the log. If print_to_stdout is True, also print to stdout."""
+        if not self.is_main_process:
+            return
         with open(self.log_path, 'a') as log_file:
             log_file.write(message + '\n')
         if print_to_stdout:
@@ -41,10 +41,10 @@ class TrainLogger(BaseLogger):
 
     def _get_avg_losses(self, as_string=False):
         if as_string:
-            s = ', '.join('{}: {:.3g}'.format(k, v.avg) for k, v in self.loss_meters.items())
+            s = ', '.join('{}: {:.3g}'.format(k, float(v.avg)) for k, v in self.loss_meters.items())
             return s
         else:
-            loss_dict = {'batch_{}'.format(k): v.avg for k, v in self.loss_meters.items()}
+            loss_dict = {'batch_{}'.format(k): float(v.avg) for k, v in self.loss_meters.items()}
             return loss_dict
 
     def start_iter(self):
@@ -53,7 +53,8 @@ class TrainLogger(BaseLogger):
 
     def log_iter(self, inputs, cls_logits, targets, cls_loss, optimizer):
         """Log results from a training iteration."""
-        cls_loss = None if cls_loss is None else cls_loss.item()
+        # Keep the loss on the device: copying it to the host (a CUDA sync) only happens when printing
+        cls_loss = None if cls_loss is None else cls_loss.detach()
         self._update_loss_meters(inputs.size(0), cls_loss)
 
         # Periodically write to the log and TensorBoard
@@ -1,4 +1,5 @@
 import random
+import torch
 import torch.nn as nn
 
 from models.layers.penet import SEBlock
@@ -20,6 +21,9 @@ class PENetBottleneck(nn.Module):
         mid_channels = cardinality * int(channels / cardinality)
         out_channels = channels * self.expansion
         self.survival_prob = self._get_survival_prob(block_idx, total_blocks)
+        # If True, draw stochastic depth on the device instead of skipping the block on the host.
+        # Traced or graph-captured models replay host-side branches as recorded, so they need this.
+        self.drop_on_device = False
 
         self.down_sample = None
         if stride != 1 or in_channels != channels * PENetBottleneck.expansion:
@@ -59,7 +63,7 @@ class PENetBottleneck(nn.Module):
         x_skip = x if self.down_sample is None else self.down_sample(x)
 
         # Stochastic depth dropout
-        if self.training and random.random() > self.survival_prob:
+        if self.training and not self.drop_on_device and random.random() > self.survival_prob:
             return x_skip
 
         x = self.conv1(x)
@@ -78,4 +82,9 @@ class PENetBottleneck(nn.Module):
 
         x = self.relu3(x)
 
+        if self.training and self.drop_on_device:
+            # Always run the block, then keep its output with probability survival_prob
+            keep = (torch.rand((), device=x.device) < self.survival_prob).to(x.dtype)
+            x = x_skip + keep * (x - x_skip)
+
         return x
@@ -1,6 +1,7 @@
 import math
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import util
 
 from models.layers.penet import *
@@ -76,11 +77,16 @@ class PENetClassifier(nn.Module):
 
     def forward(self, x):
 
-        # Expand input (allows pre-training on RGB videos, fine-tuning on Hounsfield Units)
-        if x.size(1) < self.num_channels:
-            x = x.expand(-1, self.num_channels // x.size(1), -1, -1, -1)
-
-        x = self.in_conv(x)
+        # Expand input (allows pre-training on RGB videos, fine-tuning on Hounsfield Units).
+        # The expanded channels are identical copies, so sum the first conv's weights over channels
+        # instead: same output, but the full-resolution conv reads one channel rather than num_channels.
+        if x.size(1) == 1 and self.num_channels > 1:
+            conv = self.in_conv[0]
+            x = F.conv3d(x, conv.weight.sum(dim=1, keepdim=True), conv.bias,
+                         conv.stride, conv.padding, conv.dilation, conv.groups)
+            x = self.in_conv[1:](x)
+        else:
+            x = self.in_conv(x)
         x = self.max_pool(x)
 
         # Encoders
@@ -1,9 +1,12 @@
+import copy
 import models
 import os
 import shutil
 import torch
 import torch.nn as nn
 
+from concurrent.futures import ThreadPoolExecutor
+
 
 class ModelSaver(object):
     """Class to save and load model ckpts."""
@@ -27,6 +30,10 @@ class ModelSaver(object):
         self.best_metric_val = None
         self.ckpt_paths = []
 
+        # Checkpoints are written by a single background thread, so writes happen in order
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_write = None
+
     def _is_best(self, metric_val):
         """Check whether metric_val is the best one we've seen so far."""
         if metric_val is None:
@@ -35,7 +42,7 @@ class ModelSaver(object):
                 or (self.maximize_metric and self.best_metric_val < metric_val)
                 or (not self.maximize_metric and self.best_metric_val > metric_val))
 
-    def save(self, epoch, model, optimizer, lr_scheduler=None, device=None, metric_val=None):
+    def save(self, epoch, model, optimizer, lr_scheduler=None, device=None, metric_val=None, grad_scaler=None):
         """If this epoch corresponds to a save epoch, save model parameters to disk.
 
         Args:
@@ -45,16 +52,21 @@ class ModelSaver(object):
             lr_scheduler: Learning rate scheduler for optimizer.
             device: Device where the model/optimizer parameters belong.
             metric_val: Value for determining whether checkpoint is best so far.
+            grad_scaler: Optional GradScaler for mixed precision. Saved only if enabled.
         """
         if epoch % self.epochs_per_save != 0:
             return
 
+        # Snapshot parameters on the CPU without moving the live model (unsafe under DistributedDataParallel).
+        # Optimizer state is copied too, since training keeps updating it while the checkpoint is written.
+        model_state = self._to_cpu(model.state_dict())
+
         if lr_scheduler is None:
             ckpt_dict = {
                 'ckpt_info': {'epoch': epoch, self.metric_name: metric_val},
                 'model_name': model.__class__.__name__,
-                'model_state': model.to('cpu').state_dict(),
-                'optimizer': optimizer.state_dict(),
+                'model_state': model_state,
+                'optimizer': self._to_cpu(optimizer.state_dict()),
             }
 
         else:
@@ -62,27 +74,58 @@ class ModelSaver(object):
                 'ckpt_info': {'epoch': epoch, self.metric_name: metric_val},
                 'model_name': model.module.__class__.__name__,
                 'model_args': model.module.args_dict(),
-                'model_state': model.to('cpu').state_dict(),
-                'optimizer': optimizer.state_dict(),
-                'lr_scheduler': lr_scheduler.state_dict()
+                'model_state': model_state,
+                'optimizer': self._to_cpu(optimizer.state_dict()),
+                'lr_scheduler': self._to_cpu(lr_scheduler.state_dict())
             }
-        model.to(device)
+        if grad_scaler is not None and grad_scaler.is_enabled():
+            ckpt_dict['grad_scaler'] = grad_scaler.state_dict()
 
         ckpt_path = os.path.join(self.save_dir, 'epoch_{}.pth.tar'.format(epoch))
-        torch.save(ckpt_dict, ckpt_path)
-
+        best_path = None
         if self._is_best(metric_val):
             # Save the best model
             self.best_metric_val = metric_val
             best_path = os.path.join(self.save_dir, 'best.pth.tar')
-            shutil.copy(ckpt_path, best_path)
 
         # Remove a checkpoint if more than max_ckpts ckpts saved
         self.ckpt_paths.append(ckpt_path)
-        if len(self.ckpt_paths) > self.max_ckpts:
-            oldest_ckpt = self.ckpt_paths.pop(0)
+        oldest_ckpt = self.ckpt_paths.pop(0) if len(self.ckpt_paths) > self.max_ckpts else None
+
+        # Write to disk in the background so the next epoch can start right away
+        self.wait()
+        self.pending_write = self.executor.submit(self._write, ckpt_dict, ckpt_path, best_path, oldest_ckpt)
+
+    def wait(self):
+        """Block until the pending checkpoint write (if any) is on disk. Re-raises errors from the write."""
+        if self.pending_write is not None:
+            self.pending_write.result()
+            self.pending_write = None
+
+    @staticmethod
+    def _write(ckpt_dict, ckpt_path, best_path=None, oldest_ckpt=None):
+        """Write a checkpoint, copy it to best_path if given, then remove oldest_ckpt if given."""
+        torch.save(ckpt_dict, ckpt_path)
+        if best_path is not None:
+            shutil.copy(ckpt_path, best_path)
+        if oldest_ckpt is not None:
             os.remove(oldest_ckpt)
 
+    @classmethod
+    def _to_cpu(cls, obj):
+        """Recursively copy all tensors in a (nested) state dict to the CPU."""
+        if torch.is_tensor(obj):
+            return obj.detach().to('cpu', copy=True)
+        elif isinstance(obj, dict):
+            # Shallow-copy to keep dict subclasses (e.g. the Counter of MultiStepLR milestones)
+            obj_copy = copy.copy(obj)
+            for k, v in obj.items():
+                obj_copy[k] = cls._to_cpu(v)
+            return obj_copy
+        elif isinstance(obj, (list, tuple)):
+            return type(obj)(cls._to_cpu(v) for v in obj)
+        return obj
+
     @classmethod
     def load_model(cls, ckpt_path, gpu_ids):
         """Load model parameters from disk.
@@ -110,15 +153,18 @@ class ModelSaver(object):
         return model, ckpt_dict['ckpt_info']
 
     @classmethod
-    def load_optimizer(cls, ckpt_path, optimizer, lr_scheduler=None):
-        """Load optimizer and LR scheduler state from disk.
+    def load_optimizer(cls, ckpt_path, optimizer, lr_scheduler=None, grad_scaler=None):
+        """Load optimizer, LR scheduler and GradScaler state from disk.
 
         Args:
             ckpt_path: Path to checkpoint to load.
             optimizer: Optimizer to initialize with parameters from the checkpoint.
             lr_scheduler: Optional learning rate scheduler to initialize with parameters from the checkpoint.
+            grad_scaler: Optional GradScaler to initialize with the loss scale from the checkpoint, if saved.
         """
         ckpt_dict = torch.load(ckpt_path)
         optimizer.load_state_dict(ckpt_dict['optimizer'])
         if lr_scheduler is not None:
             lr_scheduler.load_state_dict(ckpt_dict['lr_scheduler'])
+        if grad_scaler is not None and 'grad_scaler' in ckpt_dict:
+            grad_scaler.load_state_dict(ckpt_dict['grad_scaler'])
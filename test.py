@@ -1,4 +1,3 @@
-import cv2
 import json
 import pickle
 import numpy as np
@@ -32,14 +31,11 @@ def test(args):
     study2labels = {}
     logger = TestLogger(args, len(data_loader.dataset), data_loader.dataset.pixel_dict)
 
-    means = []
-
     # Get model outputs, log to TensorBoard, write masks to disk window-by-window
     util.print_err('Writing model outputs to {}...'.format(args.results_dir))
     with tqdm(total=len(data_loader.dataset), unit=' windows') as progress_bar:
         for i, (inputs, targets_dict) in enumerate(data_loader):
-            means.append(inputs.mean().data[0])
-            with torch.no_grad():
+            with torch.inference_mode():
                 cls_logits = model.forward(inputs.to(args.device))
                 cls_probs = F.sigmoid(cls_logits)
 
@@ -57,8 +53,9 @@ def test(args):
                 study2slices[study_num].append(slice_idx)
                 study2probs[study_num].append(prob.item())
 
-                series = data_loader.get_series(study_num)
                 if study_num not in study2labels:
+                    # get_series is a linear scan, so only look up each study once
+                    series = data_loader.get_series(study_num)
                     study2labels[study_num] = int(series.is_positive)
 
             progress_bar.update(inputs.size(0))
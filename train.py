@@ -1,3 +1,4 @@
+import contextlib
 import data_loader
 import models
 import torch
@@ -7,7 +8,11 @@ import util
 from args import TrainArgParser
 from evaluator import ModelEvaluator
 from logger import TrainLogger
+from models.layers.penet import PENetBottleneck
 from saver import ModelSaver
+from torch.nn.parallel import DistributedDataParallel as DDP
+from torch.utils.data.distributed import DistributedSampler
+from util.transforms import GPUAugmenter
 
 
 def train(args):
@@ -22,6 +27,21 @@ def train(args):
             model.load_pretrained(args.ckpt_path, args.gpu_ids)
         model = nn.DataParallel(model, args.gpu_ids)
     model = model.to(args.device)
+    if args.channels_last:
+        # NDHWC lets cuDNN pick its faster 3D convolution kernels, especially with mixed precision
+        model = model.to(memory_format=torch.channels_last_3d)
+    if args.compile_mode:
+        # Compile in place so parameter names (and therefore checkpoints) are unchanged
+        model.module.compile(mode=args.compile_mode)
+    if args.distributed:
+        # One process per GPU: replace the DataParallel wrapper with DDP, which overlaps allreduce with backward.
+        # Stochastic depth skips a different set of blocks on each rank, so some parameters get no gradient.
+        model = DDP(model.module, device_ids=args.gpu_ids, gradient_as_bucket_view=True, find_unused_parameters=True)
+    if args.jit_trace or args.cuda_graphs:
+        # Traces and CUDA graphs replay host-side branches as recorded, so draw stochastic depth on the device
+        for module in model.modules():
+            if isinstance(module, PENetBottleneck):
+                module.drop_on_device = True
     model.train()
 
     # Get optimizer and scheduler
@@ -31,48 +51,141 @@ def train(args):
         parameters = model.parameters()
     optimizer = util.get_optimizer(parameters, args)
     lr_scheduler = util.get_scheduler(optimizer, args)
+
+    # Mixed precision: float16 needs loss scaling to avoid gradient underflow, bfloat16 does not
+    amp_dtype = torch.bfloat16 if args.amp_dtype == 'bfloat16' else torch.float16
+    scaler = torch.amp.GradScaler('cuda', enabled=args.use_amp and amp_dtype == torch.float16)
     if args.ckpt_path and not args.use_pretrained and not args.fine_tune:
-        ModelSaver.load_optimizer(args.ckpt_path, optimizer, lr_scheduler)
+        ModelSaver.load_optimizer(args.ckpt_path, optimizer, lr_scheduler, scaler)
 
     # Get logger, evaluator, saver
     cls_loss_fn = util.get_loss_fn(is_classification=True, dataset=args.dataset, size_average=False)
     data_loader_fn = data_loader.__dict__[args.data_loader]
     train_loader = data_loader_fn(args, phase='train', is_training=True)
+    if args.toy and args.device == 'cuda':
+        # Toy dataset fits in GPU memory, so skip the per-batch host-to-device copy entirely
+        train_loader = data_loader.GPUCachedLoader(train_loader, args.device, shuffle=True)
     logger = TrainLogger(args, len(train_loader.dataset), train_loader.dataset.pixel_dict)
-    eval_loaders = [data_loader_fn(args, phase='val', is_training=False)]
-    evaluator = ModelEvaluator(args.do_classify, args.dataset, eval_loaders, logger,
-                               args.agg_method, args.num_visuals, args.max_eval, args.epochs_per_eval)
+    augmenter = None
+    if args.gpu_augment:
+        # Air is clipped to 0 before mean subtraction, so this fills rotated-in corners with air
+        augmenter = GPUAugmenter(args.do_hflip, args.do_vflip, args.do_rotate,
+                                 fill_value=-train_loader.dataset.pixel_dict['avg_val'])
+    evaluator = None
+    if util.is_main_process():
+        # Only the main process evaluates and saves, then shares the metrics with the other processes
+        eval_loaders = [data_loader_fn(args, phase='val', is_training=False)]
+        evaluator = ModelEvaluator(args.do_classify, args.dataset, eval_loaders, logger,
+                                   args.agg_method, args.num_visuals, args.max_eval, args.epochs_per_eval)
     saver = ModelSaver(args.save_dir, args.epochs_per_save, args.max_ckpts, args.best_ckpt_metric, args.maximize_metric)
 
+    # Normalize summed losses by the nominal number of examples per optimizer step,
+    # so examples in a short final batch get the same weight as all others
+    examples_per_step = train_loader.batch_size_ * args.accumulate_steps
+
+    # With --jit_trace, the model is traced on the first batch. The trace shares parameters with `model`,
+    # and stochastic depth is drawn on the device so the trace does not freeze one set of skipped blocks.
+    traced_model = None
+
+    def forward_backward(inputs, cls_targets, forward_model):
+        """Run the forward pass and backpropagate the scaled loss. Returns logits and per-example losses."""
+        # Autocast's cast cache cannot outlive a graph capture
+        with torch.autocast('cuda', dtype=amp_dtype, enabled=args.use_amp, cache_enabled=not args.cuda_graphs):
+            cls_logits = forward_model(inputs)
+        cls_loss = cls_loss_fn(cls_logits.float(), cls_targets)
+        scaler.scale(cls_loss.sum() / examples_per_step).backward()
+        return cls_logits, cls_loss
+
+    # With --cuda_graphs, forward and backward for a full batch are captured once after some eager warmup
+    # steps (on a side stream, as capture requires), then replayed from static input and output tensors.
+    # Every block runs inside the graph, so all parameters get static grads and fresh skip draws per replay.
+    graph = None
+    num_warmup_iters = 0
+    warmup_stream = torch.cuda.Stream() if args.cuda_graphs else None
+
     # Train model
     while not logger.is_finished_training():
         logger.start_epoch()
+        if isinstance(getattr(train_loader, 'sampler', None), DistributedSampler):
+            # Reshuffle the shards every epoch
+            train_loader.sampler.set_epoch(logger.epoch)
 
-        for inputs, target_dict in train_loader:
+        for batch_idx, (inputs, target_dict) in enumerate(train_loader, 1):
             logger.start_iter()
-            
-            with torch.set_grad_enabled(True):
-                inputs.to(args.device)
-                cls_logits = model.forward(inputs)
-                cls_targets = target_dict['is_abnormal']
-                cls_loss = cls_loss_fn(cls_logits, cls_targets.to(args.device))
+
+            # Only step (and allreduce gradients under DDP) once every accumulate_steps batches,
+            # and flush leftover gradients on the last batch so they don't leak into the next epoch
+            do_step = batch_idx % args.accumulate_steps == 0 or batch_idx == len(train_loader)
+            sync_context = model.no_sync() if args.distributed and not do_step else contextlib.nullcontext()
+            on_warmup_stream = warmup_stream is not None and graph is None
+            if on_warmup_stream:
+                warmup_stream.wait_stream(torch.cuda.current_stream())
+            stream_context = torch.cuda.stream(warmup_stream) if on_warmup_stream else contextlib.nullcontext()
+            with torch.set_grad_enabled(True), sync_context, stream_context:
+                # Batches come from pinned memory, so the copy can overlap with compute
+                inputs = inputs.to(args.device, non_blocking=True)
+                cls_targets = target_dict['is_abnormal'].to(args.device, non_blocking=True)
+                if augmenter is not None:
+                    inputs = augmenter(inputs)
+                if args.channels_last:
+                    inputs = inputs.contiguous(memory_format=torch.channels_last_3d)
+                if args.jit_trace and traced_model is None:
+                    # Windows all have the same shape, so specialize the model for it
+                    # Skip the re-trace check: device-side stochastic depth makes outputs differ by design
+                    traced_model = torch.jit.trace(model.module, inputs, check_trace=False)
+                    traced_shape = inputs.shape
+                # Fall back to the eager model for any other shape (e.g. a short final batch)
+                forward_model = traced_model if traced_model is not None and inputs.shape == traced_shape else model
+
+                is_full_batch = inputs.size(0) == train_loader.batch_size_
+                if on_warmup_stream and is_full_batch and num_warmup_iters >= args.cuda_graph_warmup:
+                    static_inputs, static_targets = inputs.clone(), cls_targets.clone()
+                    # Gradients must not exist yet, so the captured backward allocates them as static tensors
+                    optimizer.zero_grad(set_to_none=True)
+                    graph = torch.cuda.CUDAGraph()
+                    with torch.cuda.graph(graph):
+                        static_logits, static_loss = forward_backward(static_inputs, static_targets, forward_model)
+
+                if graph is not None and inputs.shape == static_inputs.shape:
+                    # Replay writes (rather than accumulates) this batch's gradients into the static grads
+                    static_inputs.copy_(inputs)
+                    static_targets.copy_(cls_targets)
+                    graph.replay()
+                    cls_logits, cls_loss = static_logits, static_loss
+                else:
+                    if graph is not None:
+                        # Eager backward accumulates into the static grads left by the last replay
+                        optimizer.zero_grad(set_to_none=False)
+                    else:
+                        num_warmup_iters += 1
+                    cls_logits, cls_loss = forward_backward(inputs, cls_targets, forward_model)
                 loss = cls_loss.mean()
 
-                logger.log_iter(inputs, cls_logits, target_dict, cls_loss.mean(), optimizer)
+                logger.log_iter(inputs, cls_logits, target_dict, loss.detach(), optimizer)
 
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
+                if do_step:
+                    scaler.step(optimizer)
+                    scaler.update()
+                    if graph is None:
+                        # Once captured, the graph owns the grads, so they are never set to None again
+                        optimizer.zero_grad(set_to_none=True)
+            if on_warmup_stream:
+                torch.cuda.current_stream().wait_stream(warmup_stream)
 
             logger.end_iter()
             util.step_scheduler(lr_scheduler, global_step=logger.global_step)
 
-        metrics, curves = evaluator.evaluate(model, args.device, logger.epoch)
-        saver.save(logger.epoch, model, optimizer, lr_scheduler, args.device,
-                   metric_val=metrics.get(args.best_ckpt_metric, None))
+        metrics, curves = {}, {}
+        if evaluator is not None:
+            metrics, curves = evaluator.evaluate(model.module if args.distributed else model, args.device, logger.epoch)
+            saver.save(logger.epoch, model, optimizer, lr_scheduler, args.device,
+                       metric_val=metrics.get(args.best_ckpt_metric, None), grad_scaler=scaler)
+        metrics = util.broadcast_object(metrics)
         logger.end_epoch(metrics, curves)
         util.step_scheduler(lr_scheduler, metrics, epoch=logger.epoch, best_ckpt_metric=args.best_ckpt_metric)
 
+    saver.wait()
+
 
 if __name__ == '__main__':
     util.set_spawn_enabled()
@@ -7,7 +7,7 @@ python train.py --data_dir=/data4/PE_stanford/Stanford_data \
                 --batch_size=8 \
                 --best_ckpt_metric=val_AUROC \
                 --crop_shape=192,192 \
-                --cudnn_benchmark=False \
+                --cudnn_benchmark=True \
                 --dataset=pe \
                 --do_classify=True \
                 --epochs_per_eval=1 \
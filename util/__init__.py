@@ -1,3 +1,4 @@
+from .dist_util import *
 from .eval_util import *
 from .image_util import *
 from .optim_util import *
@@ -0,0 +1,44 @@
+import os
+import torch.distributed as dist
+
+
+def is_distributed():
+    """Return True if this process was launched for distributed training (e.g. by torchrun)."""
+    return 'LOCAL_RANK' in os.environ
+
+
+def get_rank():
+    """Get the global rank of this process (0 when not running distributed)."""
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank()
+    return int(os.environ.get('RANK', 0))
+
+
+def get_world_size():
+    """Get the number of distributed processes (1 when not running distributed)."""
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_world_size()
+    return int(os.environ.get('WORLD_SIZE', 1))
+
+
+def is_main_process():
+    """Return True if this process should write logs, checkpoints, and other files."""
+    return get_rank() == 0
+
+
+def broadcast_object(obj, src=0):
+    """Broadcast a picklable object from process `src` to every process.
+
+    Args:
+        obj: Object to send. Ignored on processes other than `src`.
+        src: Rank of the process whose object is sent.
+
+    Returns:
+        The object held by process `src`.
+    """
+    if not (dist.is_available() and dist.is_initialized()):
+        return obj
+    obj_list = [obj]
+    dist.broadcast_object_list(obj_list, src=src)
+
+    return obj_list[0]
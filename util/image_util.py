@@ -1,5 +1,4 @@
 import cv2
-import matplotlib.pyplot as plt
 import numpy as np
 #import SimpleITK as sitk
 import scipy.ndimage.interpolation as interpolation
@@ -248,6 +247,9 @@ def add_heat_map(pixels_np, intensities_np, alpha_img=0.33, color_map='magma', n
     Returns:
         Original pixels with heat map overlaid.
     """
+    import matplotlib.pyplot as plt  # Slow to import, so only load it when drawing
+    plt.switch_backend('agg')
+
     assert(np.max(intensities_np) <= 1 and np.min(intensities_np) >= 0)
     color_map_fn = plt.get_cmap(color_map)
     if normalize:
@@ -505,6 +507,9 @@ def get_plot(title, curve):
     Returns:
         NumPy array to be used as a PNG image.
     """
+    import matplotlib.pyplot as plt  # Slow to import, so only load it when drawing
+    plt.switch_backend('agg')
+
     fig = plt.figure()
     ax = plt.gca()
 
@@ -532,8 +537,9 @@ def get_plot(title, curve):
 
     fig.canvas.draw()
 
-    curve_img = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
+    curve_img = np.frombuffer(fig.canvas.tostring_rgb(), dtype=np.uint8)
     curve_img = curve_img.reshape(fig.canvas.get_width_height()[::-1] + (3,))
+    plt.close(fig)
 
     return curve_img
 
@@ -13,16 +13,17 @@ def get_loss_fn(is_classification, dataset, size_average=True):
     Args:
         is_classification: If true, get loss function for classification.
         dataset: Dataset class name. E.g. 'KineticsDataset'.
-        size_average: If True, take mean of outputs (only applies to BinaryFocalLoss).
+        size_average: If True, take mean of outputs. Otherwise return per-example losses,
+            so callers can reduce them exactly (e.g. weighted by the number of examples).
 
     Returns:
         Differentiable criterion that can be applied to targets, logits.
     """
 
     if dataset == 'KineticsDataset':
-        return nn.CrossEntropyLoss()
+        return nn.CrossEntropyLoss(reduction='mean' if size_average else 'none')
     else:
-        return BinaryFocalLoss()
+        return BinaryFocalLoss(size_average=size_average)
 
 
 def get_optimizer(parameters, args):
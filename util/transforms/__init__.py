@@ -1,3 +1,4 @@
+from .gpu_transforms import *
 from .spatial_transforms import *
 from .target_transforms import *
 from .temporal_transforms import *
@@ -0,0 +1,68 @@
+import math
+import torch
+import torch.nn.functional as F
+
+
+class GPUAugmenter(object):
+    """Random flips and in-plane rotations for a batch of volumes, applied on the batch's device.
+
+    Batch counterpart of the flips and rotation in `CTPEDataset3d._transform`: every example
+    draws its own parameters, but the whole batch is resampled with a single `grid_sample` call.
+    """
+
+    def __init__(self, do_hflip=True, do_vflip=False, do_rotate=True, max_degrees=15, fill_value=0.):
+        """
+        Args:
+            do_hflip: If true, flip each example horizontally with probability 0.5.
+            do_vflip: If true, flip each example vertically with probability 0.5.
+            do_rotate: If true, rotate each example in-plane by up to +/- `max_degrees`.
+            max_degrees: Maximum absolute rotation angle, in degrees.
+            fill_value: Value for pixels rotated in from outside the image (e.g. normalized air).
+        """
+        self.do_hflip = do_hflip
+        self.do_vflip = do_vflip
+        self.do_rotate = do_rotate
+        self.max_degrees = max_degrees
+        self.fill_value = fill_value
+
+    def _random_signs(self, batch_size, enabled, device):
+        """Get -1 (flip) or 1 (keep) for each example in the batch."""
+        if not enabled:
+            return torch.ones(batch_size, device=device)
+        return torch.randint(0, 2, (batch_size,), device=device).float() * 2 - 1
+
+    def __call__(self, inputs):
+        """Augment a batch.
+
+        Args:
+            inputs: Tensor of shape (batch_size, num_channels, num_slices, height, width).
+
+        Returns:
+            Augmented tensor with the same shape as `inputs`.
+        """
+        if not (self.do_hflip or self.do_vflip or self.do_rotate):
+            return inputs
+
+        batch_size, num_channels, num_slices, height, width = inputs.shape
+        device = inputs.device
+
+        if self.do_rotate:
+            degrees = torch.randint(-self.max_degrees, self.max_degrees + 1, (batch_size,), device=device)
+        else:
+            degrees = torch.zeros(batch_size, device=device)
+        angles = degrees.float() * (math.pi / 180.)
+        cos, sin = torch.cos(angles), torch.sin(angles)
+        x_signs = self._random_signs(batch_size, self.do_hflip, device)
+        y_signs = self._random_signs(batch_size, self.do_vflip, device)
+
+        # Rotation composed with flips, in grid coordinates normalized to [-1, 1] along each axis
+        theta = torch.stack([torch.stack([cos * x_signs, -sin * y_signs * height / width, torch.zeros_like(cos)], 1),
+                             torch.stack([sin * x_signs * width / height, cos * y_signs, torch.zeros_like(cos)], 1)], 1)
+
+        # Treat slices as channels so the same transform is applied to every slice of a volume
+        slices = inputs.reshape(batch_size, num_channels * num_slices, height, width)
+        grid = F.affine_grid(theta.to(slices.dtype), slices.shape, align_corners=False)
+        slices = F.grid_sample(slices - self.fill_value, grid, mode='bilinear',
+                               padding_mode='zeros', align_corners=False) + self.fill_value
+
+        return slices.reshape(inputs.shape)